@@ -5,6 +5,8 @@ import warnings
 # Suppress openpyxl warnings about unsupported extensions (conditional formatting, data validation)
 warnings.filterwarnings("ignore", message=".*extension is not supported and will be removed.*")
 
+import hashlib
+import os
 from pathlib import Path
 
 import pandas as pd
@@ -17,19 +19,114 @@ sys.path.insert(0, str(Path(__file__).resolve().parent))
 from merge.merge_all import merge_all
 
 
-def load_data():
-    root = Path(__file__).resolve().parent
+ROOT = Path(__file__).resolve().parent
+SOURCE_PATHS = (
+    ROOT / "BASE_VALORES.xlsx",
+    ROOT / "CALCULO FRETE PESO.xlsx",
+    ROOT / "COTAÇÃO_LOTAÇÃO.xlsm",
+)
+ID_COLS = ["vehicle_type", "km_inicial", "km_final", "km_total"]
+# Chart metrics, in order of preference for the line chart
+VALOR_COLS = [
+    "valor_dia_util_calculo",
+    "frete_peso_entrega",
+    "frete_peso_total_cotacao",
+    "frete_peso_viagem",
+    "pct_frete_ida",
+]
+# Merged output persisted as Parquet, keyed by source_key()
+CACHE_DIR = ROOT / ".cache"
+# Hash of the merge pipeline's source, so a code change is a cache miss too
+PIPELINE_VERSION = hashlib.sha1(
+    b"".join(p.read_bytes() for p in sorted((ROOT / "merge").glob("*.py")))
+).hexdigest()
+
+
+def source_key() -> str:
+    """Hash of the pipeline version plus (path, mtime, size) of every input.
+
+    Changes whenever an input file or the code under merge/ does.
+    """
+    stats: list = [PIPELINE_VERSION]
+    for p in SOURCE_PATHS:
+        if p.exists():
+            stat = p.stat()
+            stats.append((str(p), stat.st_mtime_ns, stat.st_size))
+        else:
+            stats.append((str(p), None, None))
+    return hashlib.sha1(repr(stats).encode()).hexdigest()
+
+
+def load_data(key: str):
+    main_path = CACHE_DIR / f"{key}_main.parquet"
+    context_path = CACHE_DIR / f"{key}_context.parquet"
+    if main_path.exists() and context_path.exists():
+        try:
+            return pd.read_parquet(main_path), pd.read_parquet(context_path)
+        except (OSError, ValueError, TypeError):
+            # Unreadable entry (e.g. truncated by a crash): drop it and rebuild
+            main_path.unlink(missing_ok=True)
+            context_path.unlink(missing_ok=True)
+
+    base_valores_path, calculo_path, cotacao_path = SOURCE_PATHS
     main, context = merge_all(
-        base_valores_path=root / "BASE_VALORES.xlsx",
-        calculo_path=root / "CALCULO FRETE PESO.xlsx",
-        cotacao_path=root / "COTAÇÃO_LOTAÇÃO.xlsm",
+        base_valores_path=base_valores_path,
+        calculo_path=calculo_path,
+        cotacao_path=cotacao_path,
     )
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        for old in CACHE_DIR.iterdir():
+            if not old.name.startswith(key):
+                old.unlink(missing_ok=True)
+        _write_parquet(main, main_path)
+        _write_parquet(context, context_path)
+    except (OSError, ValueError, TypeError):
+        # Cache is best effort (read-only dir, mixed-type column): serve the fresh data
+        main_path.unlink(missing_ok=True)
+        context_path.unlink(missing_ok=True)
     return main, context
 
 
-@st.cache_data(ttl=300)
-def get_merged_data():
-    return load_data()
+def _write_parquet(df: pd.DataFrame, path: Path) -> None:
+    """Write to a temp file and rename, so a cut-off write never leaves a partial entry."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+# cache_resource: one shared instance for every session instead of a per-session
+# copy. The frames are read-only in the app (filters build new frames); mutating
+# them in place would leak across sessions.
+@st.cache_resource(max_entries=1)
+def get_merged_data(key: str):
+    # key = source_key(): a new key (file changed) is a cache miss
+    return load_data(key)
+
+
+@st.cache_data
+def _filter_bounds(key: str, _df: pd.DataFrame) -> tuple[float, float, list[str]]:
+    """KM slider bounds and vehicle options for the data identified by ``key``.
+
+    ``key`` is ``source_key()``; ``_df`` is not hashed (leading underscore).
+    """
+    km_min = float(_df["km_inicial"].min()) if _df["km_inicial"].notna().any() else 0
+    km_max = float(_df["km_final"].max()) if _df["km_final"].notna().any() else 10000
+    return km_min, km_max, sorted(_df["vehicle_type"].dropna().unique().tolist())
+
+
+@st.cache_data
+def _schema_cols(columns: tuple[str, ...]) -> tuple[list[str], list[str]]:
+    """(show_cols, agg_cols): table column order and the valor columns present."""
+    # Drop internal columns for display
+    display_cols = [c for c in columns if not c.startswith("_source")]
+    order_cols = [c for c in ID_COLS if c in columns]
+    other_cols = [c for c in display_cols if c not in order_cols]
+    agg_cols = [c for c in VALOR_COLS if c in columns]
+    return order_cols + other_cols, agg_cols
 
 
 def main():
@@ -41,21 +138,20 @@ def main():
     )
     st.title("Dashboard de Frete – Métricas Consolidadas")
 
-    main_df, context_df = get_merged_data()
+    data_key = source_key()
+    main_df, context_df = get_merged_data(data_key)
     if main_df.empty:
         st.warning("Nenhum dado carregado. Verifique se os arquivos Excel estão na pasta do projeto.")
         return
 
     # ---- Sidebar: filters ----
     st.sidebar.header("Filtros")
-    vehicle_types = sorted(main_df["vehicle_type"].dropna().unique().tolist())
+    km_min, km_max, vehicle_types = _filter_bounds(data_key, main_df)
     selected_vehicles = st.sidebar.multiselect(
         "Tipo de veículo",
         options=vehicle_types,
         default=vehicle_types[:3] if len(vehicle_types) > 3 else vehicle_types,
     )
-    km_min = float(main_df["km_inicial"].min()) if main_df["km_inicial"].notna().any() else 0
-    km_max = float(main_df["km_final"].max()) if main_df["km_final"].notna().any() else 10000
     km_range = st.sidebar.slider(
         "Faixa de KM (inicial)",
         min_value=int(km_min),
@@ -65,15 +161,11 @@ def main():
     )
     filter_km_min, filter_km_max = km_range
 
-    # Apply filters
-    filtered = main_df.copy()
+    # Apply filters: one combined mask, one slice (no intermediate copies)
+    mask = main_df["km_inicial"].notna() & main_df["km_inicial"].between(filter_km_min, filter_km_max)
     if selected_vehicles:
-        filtered = filtered[filtered["vehicle_type"].isin(selected_vehicles)]
-    filtered = filtered[
-        (filtered["km_inicial"].notna())
-        & (filtered["km_inicial"] >= filter_km_min)
-        & (filtered["km_inicial"] <= filter_km_max)
-    ]
+        mask &= main_df["vehicle_type"].isin(selected_vehicles)
+    filtered = main_df.loc[mask]
 
     # ---- Context summary ----
     if not context_df.empty:
@@ -103,20 +195,17 @@ def main():
     m2.metric("Tipos de veículo", num_vehicles)
     m3.metric("Faixas de KM", num_km_bands)
 
+    # Column layout depends only on the schema, not on the filter values
+    show_cols, agg_cols = _schema_cols(tuple(main_df.columns))
+
     # ---- Tabs: Tabela | Gráficos ----
     tab_table, tab_charts = st.tabs(["Tabela de métricas", "Gráficos"])
 
     with tab_table:
         st.subheader("Todas as métricas")
-        # Drop internal columns for display
-        display_cols = [c for c in filtered.columns if not c.startswith("_source")]
-        numeric_cols = filtered[display_cols].select_dtypes(include=["number"]).columns.tolist()
-        id_cols = ["vehicle_type", "km_inicial", "km_final", "km_total"]
-        order_cols = [c for c in id_cols if c in filtered.columns]
-        other_cols = [c for c in display_cols if c not in order_cols]
-        show_cols = order_cols + other_cols
         st.dataframe(
-            filtered[show_cols].head(500),
+            # Slice rows before reordering columns: only 500 rows get copied
+            filtered.head(500).reindex(columns=show_cols),
             width="stretch",
             hide_index=True,
         )
@@ -125,40 +214,38 @@ def main():
     with tab_charts:
         st.subheader("Visualizações")
 
-        # Ensure we have numeric columns for charts
-        chart_df = filtered.copy()
-        for c in ("km_inicial", "km_final", "km_total"):
-            if c in chart_df.columns:
-                chart_df[c] = pd.to_numeric(chart_df[c], errors="coerce")
-        chart_df = chart_df.dropna(subset=["km_inicial", "vehicle_type"])
+        # km columns are already Int32 from merge_all; no copy or coercion needed
+        chart_df = filtered.dropna(subset=["km_inicial", "vehicle_type"])
 
         if chart_df.empty:
             st.info("Nenhum dado numérico para exibir nos gráficos. Ajuste os filtros.")
         else:
             # Line chart: valor por KM (one line per vehicle) – use first available valor column
-            valor_cols = [
-                "valor_dia_util_calculo",
-                "frete_peso_entrega",
-                "frete_peso_total_cotacao",
-                "frete_peso_viagem",
-                "pct_frete_ida",
-            ]
-            chosen_valor = next((c for c in valor_cols if c in chart_df.columns and chart_df[c].notna().any()), None)
+            chosen_valor = next((c for c in agg_cols if chart_df[c].notna().any()), None)
+            # One grouping pass feeds both charts; sums/counts keep the bar chart an exact
+            # mean over rows rather than a mean of per-KM means
+            if agg_cols:
+                grouped = chart_df.groupby(["vehicle_type", "km_inicial"], observed=True)[agg_cols]
+                sums = grouped.sum(min_count=1)
+                counts = grouped.count()
             if chosen_valor:
                 st.markdown(f"**{chosen_valor}** por faixa de KM (média por veículo)")
-                pivot = chart_df.pivot_table(
-                    index="km_inicial",
-                    columns="vehicle_type",
-                    values=chosen_valor,
-                    aggfunc="mean",
+                pivot = (
+                    (sums[chosen_valor] / counts[chosen_valor])
+                    .dropna()
+                    .unstack("vehicle_type")
+                    .sort_index()
+                    .dropna(axis=1, how="all")
                 )
                 st.line_chart(pivot)
 
             # Bar chart: compare vehicles (aggregate over KM)
             st.markdown("**Comparativo por veículo** (média sobre as faixas de KM filtradas)")
-            agg_cols = [c for c in valor_cols if c in chart_df.columns]
             if agg_cols:
-                by_vehicle = chart_df.groupby("vehicle_type")[agg_cols].mean().reset_index()
+                by_vehicle = (
+                    sums.groupby(level="vehicle_type", observed=True).sum(min_count=1)
+                    / counts.groupby(level="vehicle_type", observed=True).sum()
+                ).reset_index()
                 plot_cols = [c for c in agg_cols[:6] if by_vehicle[c].notna().any()]
                 if plot_cols:
                     st.bar_chart(by_vehicle.set_index("vehicle_type")[plot_cols])
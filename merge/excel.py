@@ -0,0 +1,90 @@
+"""Workbook access shared by the read_* modules.
+
+python-calamine is used when installed; otherwise openpyxl in read-only mode,
+which streams rows instead of building the full cell object graph.
+"""
+
+from collections.abc import Callable, Sequence
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # pragma: no cover - depends on the environment
+    CalamineWorkbook = None
+
+
+def open_workbook(path: str | Path):
+    """Open an Excel workbook once; reuse the object for every sheet read.
+
+    The caller is responsible for ``workbook.close()``.
+    """
+    if CalamineWorkbook is not None:
+        return CalamineWorkbook.from_path(str(path))
+    import openpyxl
+
+    return openpyxl.load_workbook(path, read_only=True, data_only=True)
+
+
+def sheet_names(workbook) -> list[str]:
+    """Sheet names of a workbook returned by ``open_workbook``."""
+    if CalamineWorkbook is not None and isinstance(workbook, CalamineWorkbook):
+        return workbook.sheet_names
+    return workbook.sheetnames
+
+
+def read_sheet(
+    workbook,
+    sheet_name: str,
+    header: int | None = None,
+    max_col: int | Callable[[Sequence], int] | None = None,
+) -> pd.DataFrame:
+    """Read one sheet like ``pd.read_excel``, without pandas' per-cell type inference.
+
+    Empty cells come back from calamine as "" and are turned into NaN so the
+    readers can keep using ``pd.notna`` / ``pd.isna``. With ``header=0`` the
+    first row becomes the column labels, renamed like ``pd.read_excel`` does.
+
+    ``max_col`` keeps only the first N columns. It may also be a function of the
+    sheet's first row returning N, for sheets whose width depends on their header.
+    """
+    if CalamineWorkbook is not None and isinstance(workbook, CalamineWorkbook):
+        rows = workbook.get_sheet_by_name(sheet_name).to_python(skip_empty_area=False)
+        if callable(max_col):
+            max_col = max_col(rows[0]) if rows else None
+        if max_col is not None:
+            rows = [row[:max_col] for row in rows]
+        df = pd.DataFrame(rows)
+        if not df.empty:
+            df = df.mask(df.eq(""))
+    else:
+        ws = workbook[sheet_name]
+        if callable(max_col):
+            # Scan the header row, then re-iterate with the column bound
+            first = next(ws.iter_rows(max_row=1, values_only=True), None)
+            max_col = max_col(first) if first else None
+        df = pd.DataFrame(ws.iter_rows(max_col=max_col, values_only=True))
+    if header is not None and len(df) > header:
+        df.columns = _header_labels(df.iloc[header].tolist())
+        df = df.iloc[header + 1 :].reset_index(drop=True)
+    return df
+
+
+def _header_labels(row: list) -> list:
+    """Column labels as ``pd.read_excel`` builds them.
+
+    Blank cells become "Unnamed: i"; repeated labels become "X.1", "X.2", ...
+    """
+    labels = []
+    counts: dict = {}
+    for i, v in enumerate(row):
+        label = f"Unnamed: {i}" if pd.isna(v) or v == "" else v
+        count = counts.get(label, 0)
+        while count > 0:
+            counts[label] = count + 1
+            label = f"{label}.{count}"
+            count = counts.get(label, 0)
+        counts[label] = count + 1
+        labels.append(label)
+    return labels
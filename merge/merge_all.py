@@ -7,6 +7,7 @@ import pandas as pd
 from .read_base_valores import read_base_valores
 from .read_calculo_frete import read_calculo_frete
 from .read_cotacao import read_cotacao
+from .vehicle_mapping import CANONICAL_VEHICLES
 
 
 def merge_all(
@@ -50,49 +51,51 @@ def merge_all(
     if not main_dfs:
         return pd.DataFrame(), pd.DataFrame()
 
-    # Join keys: vehicle_type, km_inicial, km_final (allow small float tolerance for km)
-    def round_km(df: pd.DataFrame) -> pd.DataFrame:
-        d = df.copy()
+    # One shared categorical dtype so merge keeps vehicle_type as int codes;
+    # unmapped names (e.g. from COTAÇÃO BASE) are appended instead of becoming NaN
+    extra = [
+        v
+        for df in main_dfs
+        for v in df["vehicle_type"].dropna().unique()
+        if v not in CANONICAL_VEHICLES
+    ]
+    vehicle_dtype = pd.CategoricalDtype(categories=list(dict.fromkeys([*CANONICAL_VEHICLES, *extra])))
+    for df in main_dfs:
+        df["vehicle_type"] = df["vehicle_type"].astype(vehicle_dtype)
+        # km keys are whole numbers: 4-byte nullable ints halve the join-key memory
         for c in ("km_inicial", "km_final", "km_total"):
-            if c in d.columns:
-                d[c] = pd.to_numeric(d[c], errors="coerce")
-        return d
-
-    main = main_dfs[0]
-    for df in main_dfs[1:]:
-        main = main.merge(
-            df,
-            on=["vehicle_type", "km_inicial", "km_final"],
-            how="outer",
-            suffixes=("", "_dup"),
-        )
-        # Drop duplicate columns (suffix _dup)
-        dup_cols = [c for c in main.columns if c.endswith("_dup")]
-        main = main.drop(columns=dup_cols, errors="ignore")
-
-    # Fill km_total if missing
+            if c in df.columns:
+                df[c] = pd.to_numeric(df[c], errors="coerce").round().astype("Int32")
+
+    # Single keyed reduction: stack all sources, then take the first non-null value
+    # per column for each (vehicle_type, km_inicial, km_final). Sources earlier in
+    # main_dfs win on overlapping columns. Duplicate keys inside one source are
+    # dropped first (first row wins) so an output row never mixes two source rows.
+    keys = ["vehicle_type", "km_inicial", "km_final"]
+    indexed = [df.set_index(keys) for df in main_dfs]
+    main = (
+        pd.concat([df[~df.index.duplicated()] for df in indexed])
+        .groupby(level=keys, observed=True, dropna=False)
+        .first()
+        .reset_index()
+    )
+
+    # Fill km_total if missing. km columns are nullable Int32, so the arithmetic
+    # propagates NA and fillna leaves rows without both bounds untouched
     if "km_total" in main.columns:
-        mask = main["km_total"].isna() & main["km_inicial"].notna() & main["km_final"].notna()
-        main.loc[mask, "km_total"] = (
-            main.loc[mask, "km_final"] - main.loc[mask, "km_inicial"] + 1
-        )
-
-    # Deduplicate: keep first row per (vehicle_type, km_inicial, km_final)
-    main = main.drop_duplicates(
-        subset=["vehicle_type", "km_inicial", "km_final"],
-        keep="first",
-    ).reset_index(drop=True)
-
-    # Context: concat all context rows (one row per source)
+        main["km_total"] = main["km_total"].fillna(main["km_final"] - main["km_inicial"] + 1)
+
+    # Arrow-backed strings: no per-value Python objects, and Streamlit can
+    # serialize them to Arrow without conversion
+    for c in main.select_dtypes(include=["object", "string"]).columns:
+        if pd.api.types.infer_dtype(main[c], skipna=True) == "string":
+            main[c] = main[c].astype("string[pyarrow]")
+
+    # Context: one row per source; keep the first non-null value per column
     if context_dfs:
-        context = pd.concat(context_dfs, axis=1)
-        # Flatten to one row: take first non-null per column
-        context_flat = context.iloc[0:1].copy()
-        for c in context.columns:
-            if c in context_flat.columns and context_flat[c].isna().all():
-                first = context[c].dropna()
-                if len(first):
-                    context_flat[c] = first.iloc[0]
+        context_flat = context_dfs[0]
+        for cdf in context_dfs[1:]:
+            context_flat = context_flat.combine_first(cdf)
     else:
         context_flat = pd.DataFrame()
 
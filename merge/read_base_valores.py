@@ -4,8 +4,12 @@ from pathlib import Path
 
 import pandas as pd
 
+from .excel import open_workbook, read_sheet, sheet_names
 from .vehicle_mapping import CANONICAL_VEHICLES, normalize_vehicle
 
+# Single-char substitutions for _slug, applied in one str.translate pass
+_SLUG_TABLE = str.maketrans({" ": "_", "/": "_", "(": "", ")": "", "-": "_", ":": "", ".": ""})
+
 
 def read_base_valores(path: str | Path) -> tuple[pd.DataFrame, pd.DataFrame]:
     """Read BASE_VALORES.xlsx.
@@ -15,11 +19,16 @@ def read_base_valores(path: str | Path) -> tuple[pd.DataFrame, pd.DataFrame]:
         - main_df: rows (vehicle_type, km_inicial, km_final, km_total, ...metrics)
         - context_df: one row with dias_uteis, etc.
     """
-    path = Path(path)
-    xl = pd.ExcelFile(path, engine="openpyxl")
+    wb = open_workbook(Path(path))
+    try:
+        return _read_base_valores(wb)
+    finally:
+        wb.close()
+
 
+def _read_base_valores(wb) -> tuple[pd.DataFrame, pd.DataFrame]:
     # ---- Context: VIAGEM (dias úteis) ----
-    df_viagem = pd.read_excel(xl, sheet_name="VIAGEM", header=None)
+    df_viagem = read_sheet(wb, "VIAGEM")
     dias_uteis = None
     for _, row in df_viagem.iterrows():
         if row.iloc[0] == "DIAS ÚTEIS:":
@@ -51,43 +60,39 @@ def read_base_valores(path: str | Path) -> tuple[pd.DataFrame, pd.DataFrame]:
         "MÃO DE OBRA + %": "mao_obra_",
         "COMBUSTÍVEL": "combustivel_",
     }
-    vehicle_metrics: list[dict] = []
+    vehicle_metrics: list[pd.DataFrame] = []
 
+    available = set(sheet_names(wb))
     for sheet in cost_sheets:
-        if sheet not in xl.sheet_names:
+        if sheet not in available:
             continue
-        df = pd.read_excel(xl, sheet_name=sheet, header=None)
+        df = read_sheet(wb, sheet, max_col=_vehicle_col_bound)
         if df.empty or df.shape[1] < 2:
             continue
         # Row 0: first col is category name, rest are vehicle names
         header_row = df.iloc[0]
-        vehicle_cols = []
-        for c in range(1, len(header_row)):
-            v = header_row.iloc[c]
-            if pd.notna(v) and isinstance(v, str) and v.strip() in CANONICAL_VEHICLES:
-                vehicle_cols.append((c, v.strip()))
+        vehicle_cols = {
+            c: v.strip()
+            for c, v in header_row.iloc[1:].items()
+            if isinstance(v, str) and v.strip() in CANONICAL_VEHICLES
+        }
         if not vehicle_cols:
             continue
         prefix = sheet_prefix.get(sheet, "").replace(" ", "_").lower()
-        for r in range(1, len(df)):
-            metric_label = df.iloc[r, 0]
-            if pd.isna(metric_label) or str(metric_label).strip() == "":
-                continue
-            metric_name = f"{prefix}{_slug(str(metric_label))}"
-            for col_idx, vehicle in vehicle_cols:
-                val = df.iloc[r, col_idx]
-                try:
-                    num = float(val) if pd.notna(val) and str(val).strip() != "" else None
-                except (ValueError, TypeError):
-                    num = None
-                if num is not None:
-                    vehicle_metrics.append(
-                        {"vehicle_type": vehicle, "metric": metric_name, "value": num}
-                    )
+        body = df.iloc[1:][[0, *vehicle_cols]]
+        body.columns = ["metric", *vehicle_cols.values()]
+        body = body.loc[:, ~body.columns.duplicated()]
+        labels = body["metric"].astype(str).str.strip()
+        body = body[body["metric"].notna() & labels.ne("")].assign(
+            metric=lambda d: prefix + d["metric"].astype(str).map(_slug)
+        )
+        long = body.melt(id_vars="metric", var_name="vehicle_type", value_name="value")
+        long["value"] = pd.to_numeric(long["value"], errors="coerce")
+        vehicle_metrics.append(long.dropna(subset=["value"]))
 
     # Pivot vehicle-level metrics to columns (one row per vehicle, no KM yet)
-    if vehicle_metrics:
-        df_v = pd.DataFrame(vehicle_metrics)
+    df_v = pd.concat(vehicle_metrics, ignore_index=True) if vehicle_metrics else pd.DataFrame()
+    if not df_v.empty:
         vehicle_pivot = df_v.pivot_table(
             index="vehicle_type", columns="metric", values="value", aggfunc="first"
         ).reset_index()
@@ -95,82 +100,41 @@ def read_base_valores(path: str | Path) -> tuple[pd.DataFrame, pd.DataFrame]:
         vehicle_pivot = pd.DataFrame({"vehicle_type": CANONICAL_VEHICLES})
 
     # ---- RELAÇÃO % FRETE IDA: KM bands × vehicle ----
-    df_rel = pd.read_excel(xl, sheet_name="RELAÇÃO % FRETE IDA", header=0)
-    if "KM INICIAL" not in df_rel.columns or "KM FINAL" not in df_rel.columns:
-        # Fallback: first two columns as km_inicial, km_final
-        df_rel = pd.read_excel(xl, sheet_name="RELAÇÃO % FRETE IDA", header=None)
-        df_rel.columns = [str(i) for i in range(len(df_rel.columns))]
-        df_rel = df_rel.rename(columns={"0": "KM INICIAL", "1": "KM FINAL"})
-    km_cols = [c for c in df_rel.columns if c in CANONICAL_VEHICLES]
-    if not km_cols:
-        # Try column names from first row
-        rel_raw = pd.read_excel(xl, sheet_name="RELAÇÃO % FRETE IDA", header=None)
-        if len(rel_raw.columns) >= 2:
-            rel_raw = rel_raw.rename(columns={0: "KM INICIAL", 1: "KM FINAL"})
-            for c in range(2, len(rel_raw.columns)):
-                v = rel_raw.iloc[0, c]
-                if pd.notna(v) and str(v).strip() in CANONICAL_VEHICLES:
-                    rel_raw = rel_raw.rename(columns={c: str(v).strip()})
-            df_rel = rel_raw.iloc[1:].copy()
-            df_rel["KM INICIAL"] = pd.to_numeric(df_rel["KM INICIAL"], errors="coerce")
-            df_rel["KM FINAL"] = pd.to_numeric(df_rel["KM FINAL"], errors="coerce")
-            km_cols = [c for c in df_rel.columns if c in CANONICAL_VEHICLES]
-
-    rows_rel: list[dict] = []
-    for _, row in df_rel.iterrows():
-        try:
-            km_i = float(row["KM INICIAL"])
-            km_f = float(row["KM FINAL"])
-        except (TypeError, ValueError):
-            continue
-        if pd.isna(km_i) or pd.isna(km_f):
-            continue
-        km_total = km_f - km_i + 1 if km_f >= km_i else 0
-        for v in km_cols:
-            val = row.get(v)
-            try:
-                pct = float(val) if pd.notna(val) else None
-            except (ValueError, TypeError):
-                pct = None
-            if pct is not None:
-                rows_rel.append(
+    # Read once; row 0 holds the labels (KM INICIAL / KM FINAL and vehicle names)
+    df_rel_raw = read_sheet(wb, "RELAÇÃO % FRETE IDA")
+    rel_frames: list[pd.DataFrame] = []
+    if len(df_rel_raw) > 1 and df_rel_raw.shape[1] >= 2:
+        labels = [str(v).strip() if pd.notna(v) else "" for v in df_rel_raw.iloc[0]]
+        # Labelled KM columns when present, otherwise the first two columns
+        if "KM INICIAL" in labels and "KM FINAL" in labels:
+            idx_i, idx_f = labels.index("KM INICIAL"), labels.index("KM FINAL")
+        else:
+            idx_i, idx_f = 0, 1
+        data = df_rel_raw.iloc[1:]
+        km_i = pd.to_numeric(data.iloc[:, idx_i], errors="coerce")
+        km_f = pd.to_numeric(data.iloc[:, idx_f], errors="coerce")
+        valid = km_i.notna() & km_f.notna()
+        km_i, km_f = km_i[valid], km_f[valid]
+        km_total = (km_f - km_i + 1).where(km_f >= km_i, 0)
+        seen: set[str] = set()
+        for c, v in enumerate(labels):
+            if c in (idx_i, idx_f) or v not in CANONICAL_VEHICLES or v in seen:
+                continue
+            seen.add(v)
+            pct = pd.to_numeric(data.iloc[:, c][valid], errors="coerce")
+            has = pct.notna()
+            rel_frames.append(
+                pd.DataFrame(
                     {
                         "vehicle_type": v,
-                        "km_inicial": km_i,
-                        "km_final": km_f,
-                        "km_total": km_total,
-                        "pct_frete_ida": pct,
+                        "km_inicial": km_i[has],
+                        "km_final": km_f[has],
+                        "km_total": km_total[has],
+                        "pct_frete_ida": pct[has],
                     }
                 )
-
-    if not rows_rel:
-        # Build minimal km bands from sheet
-        rel_raw = pd.read_excel(xl, sheet_name="RELAÇÃO % FRETE IDA", header=None)
-        for r in range(1, len(rel_raw)):
-            try:
-                km_i = float(rel_raw.iloc[r, 0])
-                km_f = float(rel_raw.iloc[r, 1])
-            except (TypeError, ValueError):
-                continue
-            for c in range(2, min(rel_raw.shape[1], 2 + len(CANONICAL_VEHICLES))):
-                v = rel_raw.iloc[0, c]
-                if pd.notna(v) and str(v).strip() in CANONICAL_VEHICLES:
-                    val = rel_raw.iloc[r, c]
-                    try:
-                        pct = float(val) if pd.notna(val) else None
-                    except (ValueError, TypeError):
-                        pct = None
-                    if pct is not None:
-                        rows_rel.append(
-                            {
-                                "vehicle_type": str(v).strip(),
-                                "km_inicial": km_i,
-                                "km_final": km_f,
-                                "km_total": km_f - km_i + 1,
-                                "pct_frete_ida": pct,
-                            }
-                        )
-    df_rel_long = pd.DataFrame(rows_rel)
+            )
+    df_rel_long = pd.concat(rel_frames, ignore_index=True) if rel_frames else pd.DataFrame()
 
     # ---- Combine: for each (vehicle, km_band) add vehicle-level metrics ----
     if not df_rel_long.empty:
@@ -185,15 +149,13 @@ def read_base_valores(path: str | Path) -> tuple[pd.DataFrame, pd.DataFrame]:
     return main_bv, context_df
 
 
+def _vehicle_col_bound(header_row) -> int:
+    """Columns to read from a cost sheet: up to its last canonical vehicle column."""
+    vehicle_idx = [
+        i for i, v in enumerate(header_row) if isinstance(v, str) and v.strip() in CANONICAL_VEHICLES
+    ]
+    return vehicle_idx[-1] + 1 if vehicle_idx else 1
+
+
 def _slug(s: str) -> str:
-    return (
-        s.lower()
-        .replace(" ", "_")
-        .replace("%", "pct")
-        .replace("/", "_")
-        .replace("(", "")
-        .replace(")", "")
-        .replace("-", "_")
-        .replace(":", "")
-        .replace(".", "")
-    )[:50]
+    return s.lower().replace("%", "pct").translate(_SLUG_TABLE)[:50]
@@ -2,8 +2,10 @@
 
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+from .excel import open_workbook, read_sheet, sheet_names
 from .vehicle_mapping import normalize_vehicle
 
 # Sheet name -> canonical vehicle (for per-vehicle sheets)
@@ -31,15 +33,23 @@ def read_calculo_frete(path: str | Path) -> pd.DataFrame:
     Returns DataFrame with columns: vehicle_type, km_inicial, km_final, km_total,
     valor_dia_util, frete_peso_entrega, frete_peso_retorno, mensal, por_km, diario, etc.
     """
-    path = Path(path)
-    xl = pd.ExcelFile(path, engine="openpyxl")
-    out_rows: list[dict] = []
+    wb = open_workbook(Path(path))
+    try:
+        return _read_calculo_frete(wb)
+    finally:
+        wb.close()
+
+
+def _read_calculo_frete(wb) -> pd.DataFrame:
+    frames: list[pd.DataFrame] = []
 
-    for sheet in xl.sheet_names:
+    # Workbook order decides which sheet wins when two map to the same vehicle
+    for sheet in sheet_names(wb):
         if sheet not in SHEET_TO_VEHICLE:
             continue
         vehicle = SHEET_TO_VEHICLE[sheet]
-        df = pd.read_excel(xl, sheet_name=sheet, header=None)
+        # Nothing past col 20 (FRETE PESO VIAGEM) is used
+        df = read_sheet(wb, sheet, max_col=21)
         if df.shape[0] < 2 or df.shape[1] < 12:
             continue
         # Row 0: labels. Row 1+: data. Col 9,10,11 = KM INICIAL, KM FINAL, KM TOTAL (0-based)
@@ -54,72 +64,73 @@ def read_calculo_frete(path: str | Path) -> pd.DataFrame:
         idx_frete_entrega = 18
         idx_frete_retorno = 19
         idx_frete_viagem = 20
-        for r in range(1, len(df)):
-            row = df.iloc[r]
-            try:
-                km_i = float(row.iloc[idx_km_inicial])
-                km_f = float(row.iloc[idx_km_final])
-                km_t = float(row.iloc[idx_km_total])
-            except (TypeError, ValueError, IndexError):
-                continue
-            if pd.isna(km_i) or pd.isna(km_f):
-                continue
-            d: dict = {
-                "vehicle_type": vehicle,
-                "km_inicial": km_i,
-                "km_final": km_f,
-                "km_total": km_t,
-                "valor_dia_util_calculo": _num(row.iloc[idx_diario]),
-                "mensal_calculo": _num(row.iloc[idx_mensal]),
-                "por_km_calculo": _num(row.iloc[idx_por_km]),
-                "frete_peso_entrega": _num(row.iloc[idx_frete_entrega]),
-                "frete_peso_retorno": _num(row.iloc[idx_frete_retorno]),
-                "frete_peso_viagem": _num(row.iloc[idx_frete_viagem]),
-            }
-            out_rows.append(d)
+        arr = df.to_numpy()[1:]
+        km_i = _num_col(arr, idx_km_inicial)
+        km_f = _num_col(arr, idx_km_final)
+        valid = ~(np.isnan(km_i) | np.isnan(km_f))
+        if not valid.any():
+            continue
+        frames.append(
+            pd.DataFrame(
+                {
+                    "vehicle_type": vehicle,
+                    "km_inicial": km_i[valid],
+                    "km_final": km_f[valid],
+                    "km_total": _num_col(arr, idx_km_total)[valid],
+                    "valor_dia_util_calculo": _num_col(arr, idx_diario)[valid],
+                    "mensal_calculo": _num_col(arr, idx_mensal)[valid],
+                    "por_km_calculo": _num_col(arr, idx_por_km)[valid],
+                    "frete_peso_entrega": _num_col(arr, idx_frete_entrega)[valid],
+                    "frete_peso_retorno": _num_col(arr, idx_frete_retorno)[valid],
+                    "frete_peso_viagem": _num_col(arr, idx_frete_viagem)[valid],
+                }
+            )
+        )
 
-    if not out_rows:
+    if not frames:
         # Fallback: try FRETE PESO - GERAL (multi-level header)
-        df_geral = pd.read_excel(xl, sheet_name="FRETE PESO - GERAL", header=None)
+        df_geral = read_sheet(wb, "FRETE PESO - GERAL")
         if df_geral.shape[0] >= 4 and df_geral.shape[1] >= 5:
             # Row 1: FAIXA DE KM, KM INICIAL, KM FINAL, KM TOTAL, then triplets (valor, label, valor)
             # Row 2: vehicle names in triplets
             # Row 3: ENTREGA, RETORNO, TOTAL
             # Data from row 4
-            for r in range(4, len(df_geral)):
-                try:
-                    km_i = float(df_geral.iloc[r, 1])
-                    km_f = float(df_geral.iloc[r, 2])
-                    km_t = float(df_geral.iloc[r, 3])
-                except (TypeError, ValueError):
-                    continue
-                c = 4
-                while c + 2 < df_geral.shape[1]:
-                    vehicle_name = df_geral.iloc[2, c + 1]
-                    if pd.notna(vehicle_name) and isinstance(vehicle_name, str):
-                        v = normalize_vehicle(vehicle_name.strip())
-                        if v:
-                            out_rows.append(
+            arr = df_geral.to_numpy()
+            data = arr[4:]
+            km_i = _num_col(data, 1)
+            km_f = _num_col(data, 2)
+            km_t = _num_col(data, 3)
+            valid = ~(np.isnan(km_i) | np.isnan(km_f))
+            c = 4
+            while c + 2 < arr.shape[1]:
+                vehicle_name = arr[2, c + 1]
+                if pd.notna(vehicle_name) and isinstance(vehicle_name, str):
+                    v = normalize_vehicle(vehicle_name.strip())
+                    if v and valid.any():
+                        entrega = _num_col(data, c)[valid]
+                        frames.append(
+                            pd.DataFrame(
                                 {
                                     "vehicle_type": v,
-                                    "km_inicial": km_i,
-                                    "km_final": km_f,
-                                    "km_total": km_t,
-                                    "valor_dia_util_calculo": _num(df_geral.iloc[r, c]),
-                                    "frete_peso_entrega": _num(df_geral.iloc[r, c]),
-                                    "frete_peso_retorno": _num(df_geral.iloc[r, c + 1]),
-                                    "frete_peso_viagem": _num(df_geral.iloc[r, c + 2]),
+                                    "km_inicial": km_i[valid],
+                                    "km_final": km_f[valid],
+                                    "km_total": km_t[valid],
+                                    "valor_dia_util_calculo": entrega,
+                                    "frete_peso_entrega": entrega,
+                                    "frete_peso_retorno": _num_col(data, c + 1)[valid],
+                                    "frete_peso_viagem": _num_col(data, c + 2)[valid],
                                 }
                             )
-                    c += 3
+                        )
+                c += 3
 
-    return pd.DataFrame(out_rows)
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
 
 
-def _num(x) -> float | None:
-    if pd.isna(x):
-        return None
-    try:
-        return float(x)
-    except (ValueError, TypeError):
-        return None
+def _num_col(arr: np.ndarray, idx: int) -> np.ndarray:
+    """Column ``idx`` of a raw sheet array as float64; non-numeric or missing -> NaN."""
+    if idx >= arr.shape[1]:
+        return np.full(arr.shape[0], np.nan)
+    return pd.to_numeric(arr[:, idx], errors="coerce").astype("float64")
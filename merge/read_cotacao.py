@@ -4,6 +4,7 @@ from pathlib import Path
 
 import pandas as pd
 
+from .excel import open_workbook, read_sheet
 from .vehicle_mapping import TO_CANONICAL, normalize_vehicle
 
 
@@ -15,11 +16,16 @@ def read_cotacao(path: str | Path) -> tuple[pd.DataFrame, pd.DataFrame]:
         - main_df: (vehicle_type, km_inicial, km_final, km_total, frete_peso_total_cotacao, ...)
         - context_df: numero_cotacao, data, cliente, etc.
     """
-    path = Path(path)
-    xl = pd.ExcelFile(path, engine="openpyxl")
+    wb = open_workbook(Path(path))
+    try:
+        return _read_cotacao(wb)
+    finally:
+        wb.close()
+
 
+def _read_cotacao(wb) -> tuple[pd.DataFrame, pd.DataFrame]:
     # ---- Context from COTAÇÃO sheet ----
-    df_cot = pd.read_excel(xl, sheet_name="COTAÇÃO", header=None)
+    df_cot = read_sheet(wb, "COTAÇÃO", max_col=4)
     context: dict = {}
     for r in range(min(20, len(df_cot))):
         label = df_cot.iloc[r, 0]
@@ -27,11 +33,11 @@ def read_cotacao(path: str | Path) -> tuple[pd.DataFrame, pd.DataFrame]:
         if pd.notna(label):
             s = str(label).strip()
             if s == "Nº" and r + 1 <= len(df_cot):
-                context["numero_cotacao"] = str(df_cot.iloc[r, 2]) if pd.notna(df_cot.iloc[r, 2]) else None
+                context["numero_cotacao"] = _str(df_cot.iloc[r, 2])
             elif s == "Data:" and pd.notna(val):
                 context["data_cotacao"] = val
             elif s == "Revisão:" and pd.notna(df_cot.iloc[r, 3]):
-                context["revisao"] = df_cot.iloc[r, 3]
+                context["revisao"] = _whole(df_cot.iloc[r, 3])
             elif s == "Cliente:" and pd.notna(val):
                 context["cliente"] = val
             elif s == "Origem:" and pd.notna(val):
@@ -39,11 +45,11 @@ def read_cotacao(path: str | Path) -> tuple[pd.DataFrame, pd.DataFrame]:
             elif s == "Destino:" and pd.notna(val):
                 context["destino"] = val
             elif "Km" in s and pd.notna(val):
-                context["km_rota"] = val
+                context["km_rota"] = _whole(val)
     context_df = pd.DataFrame([context])
 
     # ---- BASE: vehicle-level (peso_maximo, diaria, valor_hora, eixos) ----
-    df_base = pd.read_excel(xl, sheet_name="BASE", header=0)
+    df_base = read_sheet(wb, "BASE", header=0)
     base_cols = [c for c in df_base.columns if "TIPOS" in str(c).upper() or "VEÍCULO" in str(c)]
     name_col = base_cols[0] if base_cols else df_base.columns[0]
     vehicle_base: list[dict] = []
@@ -64,7 +70,7 @@ def read_cotacao(path: str | Path) -> tuple[pd.DataFrame, pd.DataFrame]:
     df_vehicle_base = pd.DataFrame(vehicle_base)
 
     # ---- FRETE_PESO: KM bands × vehicle columns ----
-    df_fp = pd.read_excel(xl, sheet_name="FRETE_PESO", header=None)
+    df_fp = read_sheet(wb, "FRETE_PESO")
     if len(df_fp) < 2:
         main_cot = df_vehicle_base.copy() if not df_vehicle_base.empty else pd.DataFrame()
         if not main_cot.empty:
@@ -118,3 +124,16 @@ def _num(x) -> float | None:
         return float(x)
     except (ValueError, TypeError):
         return None
+
+
+def _str(x) -> str | None:
+    if pd.isna(x):
+        return None
+    return str(_whole(x))
+
+
+def _whole(x):
+    # calamine returns every number as float; keep 123, not 123.0
+    if isinstance(x, float) and x.is_integer():
+        return int(x)
+    return x